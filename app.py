@@ -2,17 +2,32 @@ import streamlit as st
 import subprocess
 import sys
 import os
+import shutil
 import tempfile
+import threading
 import re
+import bisect
 import numpy as np
 import librosa
-from scipy.signal import fftconvolve
+from scipy.signal import oaconvolve
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 # ── Constants ────────────────────────────────────────────────────────────────
 SAMPLE_RATE = 16000        # Downsample everything to 16 kHz mono
 CLIP_DURATION = 30.0       # Use first N seconds of uploaded audio as template
 SEARCH_WINDOW = 1800       # 30-minute search window in seconds
+UPLOAD_COPY_BUFFER = 1 << 20   # Stream uploads to disk in 1 MB pieces
+PIPE_DECODE_SUFFIXES = {".mp3", ".wav"}   # Formats ffmpeg can demux from a non-seekable pipe
+
+YOUTUBE_SCOPES = ['https://www.googleapis.com/auth/youtube.force-ssl']   # Same scope as auth.py
+YT_DLP_EXTRACTOR_ARGS = "youtube:player_client=default,-android_sdkless"
+NWTV_STREAMS_URL = "https://www.youtube.com/@nwtvmedia/streams"
+NWTV_VIDEOS_URL = "https://www.youtube.com/@nwtvmedia/videos"
+API_NUM_RETRIES = 5        # YouTube API retries with exponential backoff on 429/5xx
+
+SRT_BLOCK_SPLIT = re.compile(r"\n\s*\n")
+SRT_TIME_PATTERN = re.compile(r"(\d{2}:\d{2}:\d{2},\d{3})\s*-->\s*(\d{2}:\d{2}:\d{2},\d{3})")
 
 # ── Helpers ──────────────────────────────────────────────────────────────────
 
@@ -36,8 +51,12 @@ def download_youtube_audio(url: str, output_path: str) -> None:
     cmd = [
         sys.executable, "-m", "yt_dlp",
         "--no-playlist",
+        "--no-progress",               # progress lines would only pile up in captured output
         "--js-runtimes", "node",
-        "--extractor-args", "youtube:player_client=default,-android_sdkless",
+        "--extractor-args", YT_DLP_EXTRACTOR_ARGS,
+        "--concurrent-fragments", "4", # only applies if a fragmented (HLS/DASH) format is picked; no-op for plain https
+        "--retry-sleep", "http:exp=1:30",      # back off exponentially on transient HTTP errors
+        "--retry-sleep", "fragment:exp=1:30",  # ...and on failed fragments, instead of retrying at once
         "-x",                          # extract audio
         "--audio-format", "mp3",
         "--postprocessor-args",
@@ -45,31 +64,59 @@ def download_youtube_audio(url: str, output_path: str) -> None:
         "-o", output_path,
     ]
     cmd.append(url)
-    result = subprocess.run(cmd, capture_output=True, text=True)
+    result = subprocess.run(cmd, stdin=subprocess.DEVNULL, capture_output=True, text=True)
     if result.returncode != 0:
         raise RuntimeError(
             f"yt-dlp failed (code {result.returncode}):\n{result.stderr}"
         )
 
 
+def fetch_youtube_audio(url: str, name: str, on_downloaded=None) -> np.ndarray:
+    """
+    Download a YouTube URL's audio into a private temporary directory and
+    load it as a 16 kHz mono array. The directory, including any yt-dlp
+    leftovers, is removed afterwards. A per-run directory keeps concurrent
+    sessions fetching the same video from overwriting or deleting each
+    other's download. `on_downloaded`, if given, is called between the
+    download and the decode (e.g. to report progress).
+    """
+    with tempfile.TemporaryDirectory(prefix="yt_audio_") as tmp_dir:
+        output_path = os.path.join(tmp_dir, f"{name}.mp3")
+        download_youtube_audio(url, output_path)
+        if on_downloaded is not None:
+            on_downloaded()
+        return load_full_audio(output_path)
+
+
 def upload_caption_track(youtube, video_id: str, language: str, name: str, media) -> str:
     """
     Uploads a caption track to a YouTube video.
     If a caption track with the same language and name already exists, deletes it first.
     Returns the new caption track ID.
     """
+    from googleapiclient.errors import HttpError
+
     # List existing caption tracks for the video
-    captions_list = youtube.captions().list(part="snippet", videoId=video_id).execute()
+    captions_list = youtube.captions().list(part="snippet", videoId=video_id).execute(num_retries=API_NUM_RETRIES)
     
     # Check if a track with the same language and name exists
     for item in captions_list.get('items', []):
         snippet = item.get('snippet', {})
         if snippet.get('language') == language and snippet.get('name') == name:
-            # Delete the existing caption track
-            youtube.captions().delete(id=item['id']).execute()
+            # Delete the existing caption track. A 404 means a retried delete
+            # already succeeded on an earlier attempt, so it is not an error.
+            try:
+                youtube.captions().delete(id=item['id']).execute(num_retries=API_NUM_RETRIES)
+            except HttpError as e:
+                if e.resp.status != 404:
+                    raise
             break
             
-    # Insert the new caption track
+    # Insert the new caption track. The media upload is resumable, so
+    # num_retries re-sends the session request and chunks within one upload
+    # session instead of repeating the insert. If every retry fails after the
+    # final chunk landed, the track may exist anyway; uploading again replaces
+    # it through the delete above.
     request = youtube.captions().insert(
         part="snippet",
         body={
@@ -82,37 +129,135 @@ def upload_caption_track(youtube, video_id: str, language: str, name: str, media
         },
         media_body=media
     )
-    response = request.execute()
+    response = request.execute(num_retries=API_NUM_RETRIES)
     return response['id']
 
 
+def remove_token_file() -> None:
+    """Delete the saved token.json, if there is one."""
+    try:
+        os.remove('token.json')
+    except FileNotFoundError:
+        pass
+
+
+def save_youtube_credentials(creds) -> None:
+    """Write credentials to token.json."""
+    with open('token.json', 'w') as token_file:
+        token_file.write(creds.to_json())
+
+
+def load_youtube_credentials(force_refresh: bool = False):
+    """
+    Load the saved token.json credentials, refreshing them and writing the
+    new token back to disk if they have expired (or always, with force_refresh).
+    """
+    from google.oauth2.credentials import Credentials
+    from google.auth.transport.requests import Request
+
+    creds = Credentials.from_authorized_user_file('token.json', YOUTUBE_SCOPES)
+    if force_refresh or (creds and creds.expired and creds.refresh_token):
+        creds.refresh(Request())
+        save_youtube_credentials(creds)
+    return creds
+
+
+def upload_srt_to_youtube(creds, video_id: str, language: str, name: str, srt_content: str) -> str:
+    """Upload an SRT string as a caption track and return the new caption track ID."""
+    from googleapiclient.discovery import build
+    from googleapiclient.http import MediaIoBaseUpload
+    import io
+
+    # In-memory MediaIoBaseUpload
+    media = MediaIoBaseUpload(
+        io.BytesIO(srt_content.encode("utf-8")),
+        mimetype="application/octet-stream",
+        resumable=True
+    )
+    youtube = build('youtube', 'v3', credentials=creds)
+    return upload_caption_track(youtube, video_id=video_id, language=language, name=name, media=media)
+
+
 def check_youtube_url(url: str) -> tuple[bool, str]:
     """Check if a YouTube URL is valid and accessible using yt-dlp."""
+    try:
+        return True, lookup_youtube_title(url)
+    except RuntimeError as e:
+        return False, str(e)
+
+
+@st.cache_data(show_spinner=False, ttl=600)
+def lookup_youtube_title(url: str) -> str:
+    """
+    Return a YouTube video's title via yt-dlp. Failures raise RuntimeError,
+    which st.cache_data does not store, so only successful checks are reused.
+    """
     cmd = [
         sys.executable, "-m", "yt_dlp",
         "--simulate",
         "--print", "title",
         "--no-playlist",
         "--js-runtimes", "node",
-        "--extractor-args", "youtube:player_client=default,-android_sdkless",
+        "--extractor-args", YT_DLP_EXTRACTOR_ARGS,
         url
     ]
-    result = subprocess.run(cmd, capture_output=True, text=True, encoding="utf-8", errors="ignore")
+    result = subprocess.run(cmd, stdin=subprocess.DEVNULL, capture_output=True, text=True, encoding="utf-8", errors="ignore")
     if result.returncode == 0:
         lines = [line.strip() for line in result.stdout.strip().split('\n') if line.strip()]
-        title = lines[-1] if lines else "Unknown Title"
-        return True, title
+        return lines[-1] if lines else "Unknown Title"
     else:
         err = result.stderr.strip()
         m = re.search(r"ERROR:\s*(.*)", err)
-        error_msg = m.group(1) if m else "Unknown error occurred"
-        return False, error_msg
+        raise RuntimeError(m.group(1) if m else "Unknown error occurred")
+
+
+class UncachedMatch(LookupError):
+    """A match found while a channel listing failed: returned, but not cached."""
+
+    def __init__(self, url: str):
+        super().__init__(url)
+        self.url = url
+
 
 def fetch_matching_youtube_url(date_str: str, target_type: str = "full_audio") -> str | None:
+    """
+    Cached wrapper around search_matching_youtube_url. Misses, and matches
+    found while a listing failed, are never cached.
+    """
+    try:
+        return lookup_matching_youtube_url(date_str, target_type)
+    except UncachedMatch as e:
+        return e.url
+    except LookupError:
+        return None
+
+
+@st.cache_data(show_spinner=False, ttl=300)
+def lookup_matching_youtube_url(date_str: str, target_type: str) -> str:
+    """
+    Cached search_matching_youtube_url. A miss raises LookupError so it is not
+    cached and the next lookup (e.g. the "Fetch URL" retry) queries YouTube
+    again. A match found while a yt-dlp listing failed raises UncachedMatch
+    for the same reason: if only the streams listing failed, the match is the
+    videos-tab fallback, which may be the same-date short clip rather than
+    the full stream.
+    """
+    listing_errors = []
+    url = search_matching_youtube_url(date_str, target_type, listing_errors)
+    if url is None:
+        raise LookupError(f"No NWTVMedia upload found for {date_str}")
+    if listing_errors:
+        raise UncachedMatch(url)
+    return url
+
+
+def search_matching_youtube_url(date_str: str, target_type: str = "full_audio", listing_errors: list | None = None) -> str | None:
     """
     Search NWTVMedia for a video or stream matching the YYYYMMDD date prefix.
     If target_type is "short_clip", searches for videos.
     If target_type is "full_audio", searches for streams, falling back to videos.
+    Failed yt-dlp listings are treated as empty and, if `listing_errors` is
+    given, appended to it.
     """
     if len(date_str) != 8 or not date_str.isdigit():
         return None
@@ -149,24 +294,31 @@ def fetch_matching_youtube_url(date_str: str, target_type: str = "full_audio") -
             sys.executable, "-m", "yt_dlp",
             "--flat-playlist",
             "--playlist-end", str(limit),
-            "--extractor-args", "youtube:player_client=default,-android_sdkless",
+            "--extractor-args", YT_DLP_EXTRACTOR_ARGS,
             "--print", "%(title)s | %(id)s",
             channel_url
         ]
-        result = subprocess.run(cmd, capture_output=True, text=True, encoding="utf-8", errors="ignore")
+        result = subprocess.run(cmd, stdin=subprocess.DEVNULL, capture_output=True, text=True, encoding="utf-8", errors="ignore")
+        if result.returncode != 0:
+            raise RuntimeError(
+                f"yt-dlp listing of {channel_url} failed (code {result.returncode}):\n{result.stderr}"
+            )
         videos = []
-        if result.returncode == 0:
-            for line in result.stdout.strip().split('\n'):
-                if '|' in line:
-                    parts = line.split('|')
-                    title = parts[0].strip()
-                    video_id = parts[-1].strip()
-                    videos.append({"title": title, "videoId": video_id})
+        for line in result.stdout.strip().split('\n'):
+            if '|' in line:
+                parts = line.split('|')
+                title = parts[0].strip()
+                video_id = parts[-1].strip()
+                videos.append({"title": title, "videoId": video_id})
         return videos
 
+    def record_listing_error(e: Exception) -> None:
+        if listing_errors is not None:
+            listing_errors.append(e)
+
     if target_type == "short_clip":
         try:
-            videos = get_channel_videos_yt_dlp("https://www.youtube.com/@nwtvmedia/videos", limit=30)
+            videos = get_channel_videos_yt_dlp(NWTV_VIDEOS_URL, limit=30)
             matched_videos = []
             for v in videos:
                 title = v.get('title', '')
@@ -177,34 +329,43 @@ def fetch_matching_youtube_url(date_str: str, target_type: str = "full_audio") -
                     matched_videos.append(f"https://www.youtube.com/watch?v={v['videoId']}")
             if matched_videos:
                 return matched_videos[-1]
-        except Exception:
-            pass
+        except Exception as e:
+            record_listing_error(e)
         return None
 
     else:
         # target_type == "full_audio"
+        # Both listings are slow yt-dlp subprocesses, so start the videos
+        # fallback alongside the streams listing. The pool is not used as a
+        # context manager: a streams match returns without waiting on videos.
+        pool = ThreadPoolExecutor(max_workers=2)
+        streams_future = pool.submit(get_channel_videos_yt_dlp, NWTV_STREAMS_URL, limit=30)
+        videos_future = pool.submit(get_channel_videos_yt_dlp, NWTV_VIDEOS_URL, limit=30)
+
         matched_streams = []
         try:
-            streams = get_channel_videos_yt_dlp("https://www.youtube.com/@nwtvmedia/streams", limit=30)
+            streams = streams_future.result()
             for v in streams:
                 title = v.get('title', '')
                 if title_matches(title):
                     matched_streams.append(f"https://www.youtube.com/watch?v={v['videoId']}")
-        except Exception:
-            pass
+        except Exception as e:
+            record_listing_error(e)
 
         if matched_streams:
+            pool.shutdown(wait=False, cancel_futures=True)
             return matched_streams[-1]
 
         matched_videos = []
         try:
-            videos = get_channel_videos_yt_dlp("https://www.youtube.com/@nwtvmedia/videos", limit=30)
+            videos = videos_future.result()
             for v in videos:
                 title = v.get('title', '')
                 if title_matches(title):
                     matched_videos.append(f"https://www.youtube.com/watch?v={v['videoId']}")
-        except Exception:
-            pass
+        except Exception as e:
+            record_listing_error(e)
+        pool.shutdown()
 
         if matched_videos:
             return matched_videos[-1]
@@ -223,6 +384,76 @@ def load_full_audio(file_path: str) -> np.ndarray:
     return y
 
 
+def load_audio_stream(file_obj) -> np.ndarray:
+    """
+    Decode a file-like object through ffmpeg's stdin into a 16 kHz mono
+    array, without writing it to a temporary file first.
+    """
+    cmd = [
+        "ffmpeg",
+        "-hide_banner",
+        "-loglevel", "error",
+        "-i", "pipe:0",
+        "-f", "f32le", "-ac", "1", "-ar", str(SAMPLE_RATE),
+        "pipe:1",
+    ]
+    # stderr goes to a file so a chatty ffmpeg can never block on a full pipe
+    with tempfile.TemporaryFile() as err_file:
+        proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=err_file)
+
+        # Feed stdin from a separate thread so stdout can be drained concurrently
+        writer_errors = []
+
+        def feed_stdin():
+            try:
+                shutil.copyfileobj(file_obj, proc.stdin, length=UPLOAD_COPY_BUFFER)
+            except BrokenPipeError:
+                pass  # ffmpeg exited early; reported via its return code below
+            except Exception as e:
+                writer_errors.append(e)
+            finally:
+                # Always send EOF, or ffmpeg (and the read below) waits forever
+                try:
+                    proc.stdin.close()
+                except BrokenPipeError:
+                    pass
+
+        writer = threading.Thread(target=feed_stdin, daemon=True)
+        writer.start()
+        raw = proc.stdout.read()
+        proc.wait()
+        writer.join()
+        # A failed read of the upload looks like a short file to ffmpeg, which
+        # may then exit cleanly; surface the real error instead
+        if writer_errors:
+            raise writer_errors[0]
+        if proc.returncode != 0:
+            err_file.seek(0)
+            stderr = err_file.read().decode("utf-8", errors="ignore")
+            raise RuntimeError(f"ffmpeg failed (code {proc.returncode}):\n{stderr}")
+    # frombuffer over bytes is read-only; copy so callers get a writable array like librosa's
+    return np.frombuffer(raw, dtype=np.float32).copy()
+
+
+def load_uploaded_audio(uploaded_file) -> np.ndarray:
+    """
+    Load a Streamlit upload as a 16 kHz mono array. Formats that can be
+    decoded from a pipe go straight to ffmpeg; MP4/M4A may keep their index
+    at the end of the file, so those still go through a temporary file.
+    """
+    suffix = os.path.splitext(uploaded_file.name)[1]
+    if suffix.lower() in PIPE_DECODE_SUFFIXES:
+        return load_audio_stream(uploaded_file)
+
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
+        shutil.copyfileobj(uploaded_file, tmp, length=UPLOAD_COPY_BUFFER)
+        tmp_path = tmp.name
+    try:
+        return load_full_audio(tmp_path)
+    finally:
+        os.remove(tmp_path)
+
+
 def find_offset(full_audio: np.ndarray, clip: np.ndarray):
     """
     Use normalised cross-correlation to find where `clip` starts in
@@ -234,8 +465,9 @@ def find_offset(full_audio: np.ndarray, clip: np.ndarray):
     full_audio = full_audio / (np.max(np.abs(full_audio)) + 1e-9)
     clip = clip / (np.max(np.abs(clip)) + 1e-9)
 
-    # Cross-correlate using FFT (fast even for long signals)
-    correlation = fftconvolve(full_audio, clip[::-1], mode="full")
+    # Cross-correlate using overlap-add FFT convolution (about the same speed and
+    # peak memory as fftconvolve on a 30-minute window; same peak)
+    correlation = oaconvolve(full_audio, clip[::-1], mode="full")
 
     # The peak in the correlation gives the best-match position
     peak_index = np.argmax(np.abs(correlation))
@@ -260,8 +492,8 @@ def find_top_offsets(full_audio: np.ndarray, clip: np.ndarray, num_candidates: i
     full_audio_norm = full_audio / (np.max(np.abs(full_audio)) + 1e-9)
     clip_norm = clip / (np.max(np.abs(clip)) + 1e-9)
 
-    # Cross-correlate using FFT
-    correlation = fftconvolve(full_audio_norm, clip_norm[::-1], mode="full")
+    # Cross-correlate using overlap-add FFT convolution
+    correlation = oaconvolve(full_audio_norm, clip_norm[::-1], mode="full")
     corr_abs = np.abs(correlation)
 
     # Energy calculations for confidence normalization
@@ -315,49 +547,66 @@ def hms_to_seconds(hms: str) -> float:
     return parts[0]
 
 
+def srt_time_to_ms(t_str: str) -> int:
+    """Convert an SRT HH:MM:SS,mmm timestamp to integer milliseconds."""
+    h, m, s, ms = int(t_str[0:2]), int(t_str[3:5]), int(t_str[6:8]), int(t_str[9:12])
+    return (h * 3600 + m * 60 + s) * 1000 + ms
+
+
+def ms_to_srt_time(total_ms: int) -> str:
+    """Format integer milliseconds as an SRT HH:MM:SS,mmm timestamp."""
+    h, rem = divmod(total_ms, 3_600_000)
+    m, rem = divmod(rem, 60_000)
+    s, ms = divmod(rem, 1000)
+    return f"{h:02d}:{m:02d}:{s:02d},{ms:03d}"
+
+
+def parse_srt_cues(srt_content: str) -> list[tuple[str, str, str, str]]:
+    """
+    Split an SRT string into cues of (start, end, timing_line, text), where
+    text is everything after the timing line. Blocks without a timing line
+    are skipped; the original index lines are dropped.
+    """
+    cues = []
+    for block in SRT_BLOCK_SPLIT.split(srt_content.strip()):
+        # Search the block directly instead of splitting it into lines first
+        match = SRT_TIME_PATTERN.search(block)
+        if not match:
+            continue
+        line_start = block.rfind('\n', 0, match.start()) + 1
+        line_end = block.find('\n', match.end())
+        if line_end == -1:
+            line_end = len(block)
+        cues.append((match.group(1), match.group(2), block[line_start:line_end], block[line_end:]))
+    return cues
+
+
 def shift_srt_content(srt_content: str, shift_seconds: float) -> str:
     """Shift all timestamps in an SRT string backwards by shift_seconds."""
-    import re
-    time_pattern = re.compile(r"(\d{2}:\d{2}:\d{2},\d{3})\s*-->\s*(\d{2}:\d{2}:\d{2},\d{3})")
-    
-    def shift_time(t_str: str, offset: float) -> str | None:
-        h, m, s, ms = int(t_str[0:2]), int(t_str[3:5]), int(t_str[6:8]), int(t_str[9:12])
-        sec = h * 3600 + m * 60 + s + ms / 1000.0 - offset
-        if sec < 0: return None
-        return f"{int(sec//3600):02d}:{int((sec%3600)//60):02d}:{int(sec%60):02d},{int(round((sec%1)*1000)):03d}"
+    offset_ms = int(round(shift_seconds * 1000))
+
+    def shift_time(t_str: str) -> str | None:
+        total_ms = srt_time_to_ms(t_str) - offset_ms
+        if total_ms < 0: return None
+        return ms_to_srt_time(total_ms)
 
-    blocks = re.split(r'\n\s*\n', srt_content.strip())
     out_lines = []
     counter = 1
-    
-    for block in blocks:
-        block_lines = block.split('\n')
-        if not block_lines: continue
+
+    for start_str, end_str, time_line, text in parse_srt_cues(srt_content):
+        new_start = shift_time(start_str)
+        new_end = shift_time(end_str)
         
-        time_line_idx = -1
-        for i, line in enumerate(block_lines):
-            if '-->' in line:
-                time_line_idx = i
-                break
-                
-        if time_line_idx != -1:
-            match = time_pattern.search(block_lines[time_line_idx])
-            if match:
-                start_str, end_str = match.group(1), match.group(2)
-                new_start = shift_time(start_str, shift_seconds)
-                new_end = shift_time(end_str, shift_seconds)
-                
-                if new_end is None:
-                    continue
-                # Drop blocks whose original start is before the cut point
-                # (i.e. shifted start is negative) to avoid residual lines
-                if new_start is None:
-                    continue
-                
-                new_time_line = block_lines[time_line_idx].replace(start_str, new_start).replace(end_str, new_end)
-                new_block = [str(counter), new_time_line] + block_lines[time_line_idx+1:]
-                out_lines.append('\n'.join(new_block))
-                counter += 1
+        if new_end is None:
+            continue
+        # Drop blocks whose original start is before the cut point
+        # (i.e. shifted start is negative) to avoid residual lines
+        if new_start is None:
+            continue
+        
+        new_time_line = time_line.replace(start_str, new_start).replace(end_str, new_end)
+        out_lines.append(f"{counter}\n{new_time_line}{text}")
+        counter += 1
                 
     return '\n\n'.join(out_lines) + '\n'
 
@@ -367,29 +616,11 @@ def shift_srt_content_piecewise(srt_content: str, cut_points: list[float], offse
     Shift all timestamps in an SRT string based on piecewise linear mapping
     determined by cut points in the short clip and their offsets in the full audio.
     """
-    import re
-    time_pattern = re.compile(r"(\d{2}:\d{2}:\d{2},\d{3})\s*-->\s*(\d{2}:\d{2}:\d{2},\d{3})")
-    
     def parse_srt_time(t_str: str) -> float:
-        h, m, s, ms = int(t_str[0:2]), int(t_str[3:5]), int(t_str[6:8]), int(t_str[9:12])
-        return h * 3600 + m * 60 + s + ms / 1000.0
+        return srt_time_to_ms(t_str) / 1000.0
 
     def format_srt_time(sec: float) -> str:
-        if sec < 0: sec = 0.0
-        h = int(sec // 3600)
-        m = int((sec % 3600) // 60)
-        s = int(sec % 60)
-        ms = int(round((sec % 1) * 1000))
-        if ms >= 1000:
-            s += 1
-            ms -= 1000
-            if s >= 60:
-                m += 1
-                s -= 60
-                if m >= 60:
-                    h += 1
-                    m -= 60
-        return f"{h:02d}:{m:02d}:{s:02d},{ms:03d}"
+        return ms_to_srt_time(max(0, int(round(sec * 1000))))
 
     def map_time(t: float) -> float | None:
         # Find the appropriate segment index
@@ -403,27 +634,20 @@ def shift_srt_content_piecewise(srt_content: str, cut_points: list[float], offse
                 return t_mapped
         return None
 
-    blocks = re.split(r'\n\s*\n', srt_content.strip())
+    # Parse every cue's times once; both the snapping pass and the output
+    # pass below work on these numbers
+    cues = [
+        (parse_srt_time(start_str), parse_srt_time(end_str), start_str, end_str, time_line, text)
+        for start_str, end_str, time_line, text in parse_srt_cues(srt_content)
+    ]
     
     # ── Snap Cut Points and Offsets to Subtitle Boundaries ────────────────────
     sub_boundaries = []
-    for block in blocks:
-        block_lines = block.split('\n')
-        if not block_lines: continue
-        time_line_idx = -1
-        for idx, line in enumerate(block_lines):
-            if '-->' in line:
-                time_line_idx = idx
-                break
-        if time_line_idx != -1:
-            match = time_pattern.search(block_lines[time_line_idx])
-            if match:
-                t_start = parse_srt_time(match.group(1))
-                t_end = parse_srt_time(match.group(2))
-                sub_boundaries.extend([t_start, t_end])
+    for t_start, t_end, *_ in cues:
+        sub_boundaries.extend([t_start, t_end])
                 
     if sub_boundaries:
-        sub_boundaries = sorted(list(set(sub_boundaries)))
+        sub_boundaries = sorted(set(sub_boundaries))
         refined_cut_points = [cut_points[0]]
         refined_offsets = [offsets[0]]
         
@@ -440,9 +664,10 @@ def shift_srt_content_piecewise(srt_content: str, cut_points: list[float], offse
             best_t2 = O_j
             min_loss = float('inf')
             
-            # Search within 15 seconds of expected and actual offsets
-            candidates_t1 = [t for t in sub_boundaries if abs(t - E_j) <= 15.0]
-            candidates_t2 = [t for t in sub_boundaries if abs(t - O_j) <= 15.0]
+            # Search within 15 seconds of expected and actual offsets; the
+            # boundaries are sorted, so bisect straight to each window
+            candidates_t1 = sub_boundaries[bisect.bisect_left(sub_boundaries, E_j - 15.0):bisect.bisect_right(sub_boundaries, E_j + 15.0)]
+            candidates_t2 = sub_boundaries[bisect.bisect_left(sub_boundaries, O_j - 15.0):bisect.bisect_right(sub_boundaries, O_j + 15.0)]
             
             for t1 in candidates_t1:
                 for t2 in candidates_t2:
@@ -472,55 +697,38 @@ def shift_srt_content_piecewise(srt_content: str, cut_points: list[float], offse
     out_lines = []
     counter = 1
     
-    for block in blocks:
-        block_lines = block.split('\n')
-        if not block_lines: continue
+    for t_start, t_end, start_str, end_str, time_line, text in cues:
+        new_start_sec = map_time(t_start)
+        new_end_sec = map_time(t_end)
         
-        time_line_idx = -1
-        for i, line in enumerate(block_lines):
-            if '-->' in line:
-                time_line_idx = i
-                break
-                
-        if time_line_idx != -1:
-            match = time_pattern.search(block_lines[time_line_idx])
-            if match:
-                start_str, end_str = match.group(1), match.group(2)
-                t_start = parse_srt_time(start_str)
-                t_end = parse_srt_time(end_str)
-                
-                new_start_sec = map_time(t_start)
-                new_end_sec = map_time(t_end)
-                
-                if new_start_sec is None and new_end_sec is None:
-                    continue
-                
-                # Drop blocks whose original start falls before the segment boundary
-                # to avoid residual partial lines at cut boundaries
-                if new_start_sec is None:
-                    continue
-                
-                if new_end_sec is None:
-                    for i in range(len(offsets) - 1, -1, -1):
-                        if t_start >= offsets[i]:
-                            if i < len(cut_points) - 1:
-                                new_end_sec = cut_points[i+1]
-                            else:
-                                new_end_sec = new_start_sec + (t_end - t_start)
-                            break
-                    if new_end_sec is None:
+        if new_start_sec is None and new_end_sec is None:
+            continue
+        
+        # Drop blocks whose original start falls before the segment boundary
+        # to avoid residual partial lines at cut boundaries
+        if new_start_sec is None:
+            continue
+        
+        if new_end_sec is None:
+            for i in range(len(offsets) - 1, -1, -1):
+                if t_start >= offsets[i]:
+                    if i < len(cut_points) - 1:
+                        new_end_sec = cut_points[i+1]
+                    else:
                         new_end_sec = new_start_sec + (t_end - t_start)
-                
-                if new_end_sec - new_start_sec <= 0.05:
-                    continue
-                
-                new_start = format_srt_time(new_start_sec)
-                new_end = format_srt_time(new_end_sec)
-                
-                new_time_line = block_lines[time_line_idx].replace(start_str, new_start).replace(end_str, new_end)
-                new_block = [str(counter), new_time_line] + block_lines[time_line_idx+1:]
-                out_lines.append('\n'.join(new_block))
-                counter += 1
+                    break
+            if new_end_sec is None:
+                new_end_sec = new_start_sec + (t_end - t_start)
+        
+        if new_end_sec - new_start_sec <= 0.05:
+            continue
+        
+        new_start = format_srt_time(new_start_sec)
+        new_end = format_srt_time(new_end_sec)
+        
+        new_time_line = time_line.replace(start_str, new_start).replace(end_str, new_end)
+        out_lines.append(f"{counter}\n{new_time_line}{text}")
+        counter += 1
                 
     return '\n\n'.join(out_lines) + '\n'
 
@@ -535,16 +743,14 @@ with st.sidebar:
     
     import os
     from google.oauth2.credentials import Credentials
-    from google.auth.transport.requests import Request
     from google_auth_oauthlib.flow import InstalledAppFlow
     
-    SCOPES = ['https://www.googleapis.com/auth/youtube.force-ssl']
     creds = None
     status = "NOT_AUTHENTICATED"
     
     if os.path.exists('token.json'):
         try:
-            creds = Credentials.from_authorized_user_file('token.json', SCOPES)
+            creds = Credentials.from_authorized_user_file('token.json', YOUTUBE_SCOPES)
             if creds:
                 if creds.valid:
                     status = "VALID"
@@ -560,23 +766,19 @@ with st.sidebar:
         if st.button("🔄 Force Refresh Token", key="sb_refresh", use_container_width=True):
             try:
                 with st.spinner("Refreshing credentials..."):
-                    creds.refresh(Request())
-                    with open('token.json', 'w') as token_file:
-                        token_file.write(creds.to_json())
+                    load_youtube_credentials(force_refresh=True)
                 st.success("Token refreshed successfully!")
                 st.rerun()
             except Exception as e:
                 if "invalid_grant" in str(e):
-                    if os.path.exists('token.json'):
-                        os.remove('token.json')
+                    remove_token_file()
                     st.error("❌ Your session has been revoked or expired. Please click 'Authenticate' to log in again.")
                     st.rerun()
                 else:
                     st.error(f"Failed to refresh: {e}")
                 
         if st.button("❌ Disconnect Account", key="sb_disconnect", use_container_width=True):
-            if os.path.exists('token.json'):
-                os.remove('token.json')
+            remove_token_file()
             st.success("Account disconnected.")
             st.rerun()
             
@@ -587,23 +789,19 @@ with st.sidebar:
         if st.button("🔄 Renew Credentials", key="sb_renew", use_container_width=True):
             try:
                 with st.spinner("Renewing credentials..."):
-                    creds.refresh(Request())
-                    with open('token.json', 'w') as token_file:
-                        token_file.write(creds.to_json())
+                    load_youtube_credentials(force_refresh=True)
                 st.success("Credentials renewed successfully!")
                 st.rerun()
             except Exception as e:
                 if "invalid_grant" in str(e):
-                    if os.path.exists('token.json'):
-                        os.remove('token.json')
+                    remove_token_file()
                     st.error("❌ Your session has been revoked or expired. Please click 'Authenticate' to log in again.")
                     st.rerun()
                 else:
                     st.error(f"Failed to renew: {e}")
                 
         if st.button("❌ Disconnect Account", key="sb_disconnect_expired", use_container_width=True):
-            if os.path.exists('token.json'):
-                os.remove('token.json')
+            remove_token_file()
             st.success("Account disconnected.")
             st.rerun()
             
@@ -617,7 +815,7 @@ with st.sidebar:
             if st.button("🔑 Authenticate", key="sb_auth", use_container_width=True):
                 try:
                     with st.spinner("Complete auth in browser..."):
-                        flow = InstalledAppFlow.from_client_secrets_file('client_secret.json', SCOPES)
+                        flow = InstalledAppFlow.from_client_secrets_file('client_secret.json', YOUTUBE_SCOPES)
                         auth_url, _ = flow.authorization_url(prompt='select_account consent', access_type='offline')
                         
                         st.info("If the auth page does not open automatically, visit this URL:")
@@ -628,8 +826,7 @@ with st.sidebar:
                             timeout_seconds=300, 
                             authorization_prompt_kwargs={'prompt': 'select_account consent', 'access_type': 'offline'}
                         )
-                        with open('token.json', 'w') as token_file:
-                            token_file.write(creds.to_json())
+                        save_youtube_credentials(creds)
                     st.success("Authenticated successfully!")
                     st.rerun()
                 except Exception as e:
@@ -681,20 +878,8 @@ with st.expander("📤 Ad-hoc YouTube Caption Upload (Skip Audio Finding)"):
             st.error("❌ Please upload an SRT file.")
         else:
             try:
-                from google.oauth2.credentials import Credentials
-                from google.auth.transport.requests import Request
-                from googleapiclient.discovery import build
-                from googleapiclient.http import MediaIoBaseUpload
-                import io
-
-                SCOPES = ['https://www.googleapis.com/auth/youtube.force-ssl']
-                creds = Credentials.from_authorized_user_file('token.json', SCOPES)
-                
-                if creds and creds.expired and creds.refresh_token:
-                    with st.spinner("Refreshing credentials..."):
-                        creds.refresh(Request())
-                        with open('token.json', 'w') as token_file:
-                            token_file.write(creds.to_json())
+                with st.spinner("Checking YouTube credentials..."):
+                    creds = load_youtube_credentials()
                             
                 video_id = extract_video_id(adhoc_url)
                 if not video_id:
@@ -702,25 +887,17 @@ with st.expander("📤 Ad-hoc YouTube Caption Upload (Skip Audio Finding)"):
                 else:
                     with st.spinner("Uploading ad-hoc subtitles to YouTube..."):
                         content = adhoc_srt_file.read().decode("utf-8")
-                        media = MediaIoBaseUpload(
-                            io.BytesIO(content.encode("utf-8")),
-                            mimetype="application/octet-stream",
-                            resumable=True
-                        )
-                        
-                        youtube = build('youtube', 'v3', credentials=creds)
-                        caption_id = upload_caption_track(
-                            youtube,
+                        caption_id = upload_srt_to_youtube(
+                            creds,
                             video_id=video_id,
                             language=adhoc_lang,
                             name=adhoc_caption_name,
-                            media=media
+                            srt_content=content
                         )
                         st.success(f"✅ Ad-hoc subtitles uploaded successfully! Caption ID: {caption_id}")
             except Exception as e:
                 if "invalid_grant" in str(e):
-                    if os.path.exists('token.json'):
-                        os.remove('token.json')
+                    remove_token_file()
                     st.error("❌ Your session has been revoked or expired. Please re-authenticate in the sidebar.")
                     st.rerun()
                 else:
@@ -933,66 +1110,78 @@ if find_btn:
         def elapsed() -> str:
             return f"[{time.time() - t0:.1f}s]"
 
+        # ── Step 0: Start the short clip download in the background ─────────
+        # The clip does not depend on the full audio, so let its download and
+        # decode overlap with Step 1 instead of waiting for it.
+        clip_future = None
+        if clip_src == "YouTube URL":
+            assert clip_url is not None
+            clip_video_id = extract_video_id(clip_url)
+            clip_cached = (
+                st.session_state.get("cached_clip_id") == clip_video_id
+                and "clip_audio" in st.session_state
+                and "clip_full_audio" in st.session_state
+            )
+            if not clip_cached:
+                status.write(f"{elapsed()}  ⬇️  Downloading short clip from YouTube in the background…")
+                clip_pool = ThreadPoolExecutor(max_workers=1)
+                clip_future = clip_pool.submit(fetch_youtube_audio, clip_url, f"yt_clip_{clip_video_id}")
+                clip_pool.shutdown(wait=False)
+
         # ── Step 1: Load Full Audio ─────────────────────────────────────────
-        if full_src == "YouTube URL":
-            assert full_url is not None
-            video_id = extract_video_id(full_url)
-            cached = st.session_state.get("cached_full_id")
-            if cached == video_id and "full_audio" in st.session_state:
-                status.write(f"{elapsed()}  ✅  Using cached full YouTube audio.")
-                full_audio = st.session_state["full_audio"]
-            else:
-                status.write(f"{elapsed()}  ⬇️  Downloading full audio from YouTube…")
-                yt_audio_path = os.path.join(tempfile.gettempdir(), f"yt_full_{video_id}.mp3")
+        try:
+            if full_src == "YouTube URL":
                 assert full_url is not None
-                download_youtube_audio(full_url, yt_audio_path)
-                status.write(f"{elapsed()}  🎵  Loading full audio into memory…")
-                full_audio = load_full_audio(yt_audio_path)
-                st.session_state["full_audio"] = full_audio
-                st.session_state["cached_full_id"] = video_id
-                if os.path.exists(yt_audio_path):
-                    os.remove(yt_audio_path)
-                status.write(f"{elapsed()}  ✅  Full audio loaded ({len(full_audio)/SAMPLE_RATE:.1f}s).")
-        else:
-            file_id = f"full_{full_input.name}_{full_input.size}"
-            if st.session_state.get("cached_full_id") == file_id and "full_audio" in st.session_state:
-                status.write(f"{elapsed()}  ✅  Using cached full local audio.")
-                full_audio = st.session_state["full_audio"]
+                video_id = extract_video_id(full_url)
+                cached = st.session_state.get("cached_full_id")
+                if cached == video_id and "full_audio" in st.session_state:
+                    status.write(f"{elapsed()}  ✅  Using cached full YouTube audio.")
+                    full_audio = st.session_state["full_audio"]
+                else:
+                    status.write(f"{elapsed()}  ⬇️  Downloading full audio from YouTube…")
+                    assert full_url is not None
+                    full_audio = fetch_youtube_audio(
+                        full_url,
+                        f"yt_full_{video_id}",
+                        on_downloaded=lambda: status.write(f"{elapsed()}  🎵  Loading full audio into memory…"),
+                    )
+                    st.session_state["full_audio"] = full_audio
+                    st.session_state["cached_full_id"] = video_id
+                    status.write(f"{elapsed()}  ✅  Full audio loaded ({len(full_audio)/SAMPLE_RATE:.1f}s).")
             else:
-                status.write(f"{elapsed()}  🎵  Loading full local audio into memory…")
-                suffix = os.path.splitext(full_input.name)[1]
-                with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-                    tmp.write(full_input.read())
-                    full_path = tmp.name
-                
-                full_audio = load_full_audio(full_path)
-                os.remove(full_path)
-                st.session_state["full_audio"] = full_audio
-                st.session_state["cached_full_id"] = file_id
-                status.write(f"{elapsed()}  ✅  Full audio loaded ({len(full_audio)/SAMPLE_RATE:.1f}s).")
+                file_id = f"full_{full_input.name}_{full_input.size}"
+                if st.session_state.get("cached_full_id") == file_id and "full_audio" in st.session_state:
+                    status.write(f"{elapsed()}  ✅  Using cached full local audio.")
+                    full_audio = st.session_state["full_audio"]
+                else:
+                    status.write(f"{elapsed()}  🎵  Loading full local audio into memory…")
+                    full_audio = load_uploaded_audio(full_input)
+                    st.session_state["full_audio"] = full_audio
+                    st.session_state["cached_full_id"] = file_id
+                    status.write(f"{elapsed()}  ✅  Full audio loaded ({len(full_audio)/SAMPLE_RATE:.1f}s).")
+        except BaseException:
+            # Don't leave the background clip download running unobserved:
+            # cancel it if it has not started yet, otherwise wait for it so it
+            # does not outlive this run, and report its error as well
+            if clip_future is not None and not clip_future.cancel():
+                clip_error = clip_future.exception()
+                if clip_error is not None:
+                    status.write(f"{elapsed()}  ❌  Short clip download also failed: {clip_error}")
+            raise
 
         # ── Step 2: Load the Short Clip ──────────────────────────────────────
         if clip_src == "YouTube URL":
-            assert clip_url is not None
-            video_id = extract_video_id(clip_url)
-            cached = st.session_state.get("cached_clip_id")
-            if cached == video_id and "clip_audio" in st.session_state and "clip_full_audio" in st.session_state:
+            if clip_future is None:
                 status.write(f"{elapsed()}  ✅  Using cached short clip audio.")
                 clip = st.session_state["clip_audio"]
                 clip_full = st.session_state["clip_full_audio"]
             else:
-                status.write(f"{elapsed()}  ⬇️  Downloading short clip from YouTube…")
-                yt_clip_path = os.path.join(tempfile.gettempdir(), f"yt_clip_{video_id}.mp3")
-                assert clip_url is not None
-                download_youtube_audio(clip_url, yt_clip_path)
-                status.write(f"{elapsed()}  🎵  Loading full clip audio into memory…")
-                clip_full = load_full_audio(yt_clip_path)
+                status.write(f"{elapsed()}  🎵  Waiting for short clip audio…")
+                clip_full = clip_future.result()
                 clip = clip_full[:int(CLIP_DURATION * SAMPLE_RATE)]
-                if os.path.exists(yt_clip_path):
-                    os.remove(yt_clip_path)
                 st.session_state["clip_audio"] = clip
                 st.session_state["clip_full_audio"] = clip_full
-                st.session_state["cached_clip_id"] = video_id
+                st.session_state["cached_clip_id"] = clip_video_id
         else:
             file_id = f"clip_{clip_input.name}_{clip_input.size}"
             if st.session_state.get("cached_clip_id") == file_id and "clip_audio" in st.session_state and "clip_full_audio" in st.session_state:
@@ -1000,15 +1189,9 @@ if find_btn:
                 clip = st.session_state["clip_audio"]
                 clip_full = st.session_state["clip_full_audio"]
             else:
-                suffix = os.path.splitext(clip_input.name)[1]
-                with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-                    tmp.write(clip_input.read())
-                    clip_path = tmp.name
-                
                 status.write(f"{elapsed()}  🎵  Loading full clip audio into memory…")
-                clip_full = load_full_audio(clip_path)
+                clip_full = load_uploaded_audio(clip_input)
                 clip = clip_full[:int(CLIP_DURATION * SAMPLE_RATE)]
-                os.remove(clip_path)
                 st.session_state["clip_audio"] = clip
                 st.session_state["clip_full_audio"] = clip_full
                 st.session_state["cached_clip_id"] = file_id
@@ -1339,21 +1522,8 @@ if "match_result" in st.session_state:
                     st.warning("⚠️ 'token.json' not found. Run `python auth.py` in the terminal to authenticate your YouTube account.")
                 else:
                     try:
-                        from google.oauth2.credentials import Credentials
-                        from google.auth.transport.requests import Request
-                        from googleapiclient.discovery import build
-                        from googleapiclient.http import MediaIoBaseUpload
-                        import io
-
-                        # Scopes from auth.py
-                        SCOPES = ['https://www.googleapis.com/auth/youtube.force-ssl']
-                        
-                        creds = Credentials.from_authorized_user_file('token.json', SCOPES)
-                        if creds and creds.expired and creds.refresh_token:
-                            with st.spinner("Refreshing YouTube credentials..."):
-                                creds.refresh(Request())
-                                with open('token.json', 'w') as token_file:
-                                    token_file.write(creds.to_json())
+                        with st.spinner("Checking YouTube credentials..."):
+                            creds = load_youtube_credentials()
                                     
                         lang = st.selectbox("Caption Language", ["ko", "en"], index=0)
                         caption_name = st.text_input("Caption Track Name", value="Korean" if lang == "ko" else "English")
@@ -1367,21 +1537,12 @@ if "match_result" in st.session_state:
                                 st.error("❌ Could not extract YouTube video ID from short clip URL.")
                             else:
                                 with st.spinner("Uploading subtitle track to YouTube..."):
-                                    youtube = build('youtube', 'v3', credentials=creds)
-                                    
-                                    # In-memory MediaIoBaseUpload
-                                    media = MediaIoBaseUpload(
-                                        io.BytesIO(shifted.encode("utf-8")),
-                                        mimetype="application/octet-stream",
-                                        resumable=True
-                                    )
-                                    
-                                    caption_id = upload_caption_track(
-                                        youtube,
+                                    caption_id = upload_srt_to_youtube(
+                                        creds,
                                         video_id=video_id,
                                         language=lang,
                                         name=caption_name,
-                                        media=media
+                                        srt_content=shifted
                                     )
                                     st.success(f"✅ Subtitles uploaded successfully! Caption ID: {caption_id}")
                     except Exception as e: